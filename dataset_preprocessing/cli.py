@@ -0,0 +1,25 @@
+import argparse
+
+
+def confidence(value: str) -> float:
+    result = float(value)
+    if not 0 <= result <= 1:
+        raise argparse.ArgumentTypeError(f'{value} is not a confidence between 0 and 1')
+
+    return result
+
+
+def positive_int(value: str) -> int:
+    result = int(value)
+    if result <= 0:
+        raise argparse.ArgumentTypeError(f'{value} is not a positive integer')
+
+    return result
+
+
+def positive_fraction(value: str) -> float:
+    result = float(value)
+    if not 0 < result <= 1:
+        raise argparse.ArgumentTypeError(f'{value} is not a fraction in (0, 1]')
+
+    return result
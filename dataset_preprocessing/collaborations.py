@@ -0,0 +1,192 @@
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+COLLABORATION_POLICIES = ('cap', 'skip', 'hub')
+
+# Collaboration IDs are the publication ID behind a prefix, so the hub of a publication is known without reading files
+COLLABORATION_HUB_PREFIX = 'collaboration-'
+
+
+def id_field(field: str, space: str) -> str:
+    return f'{field}({space})' if space else field
+
+
+def estimate_collaboration_edges(
+        df: pd.DataFrame,
+        group_column: str,
+        member_column: str,
+        relationship_type: str,
+        ordered: bool = True,
+        hub_prefix: str = COLLABORATION_HUB_PREFIX,
+) -> pd.DataFrame:
+    # Exact edge counts of the pair expansion per group, k * (k - 1) for permutations and half of it for combinations.
+    # Output bytes are exact up to CSV quoting: each member is written on k - 1 rows per side of an edge.
+    member_lengths = df[member_column].astype(str).str.len()
+    groups = member_lengths.groupby(df[group_column]).agg(['size', 'sum'])
+
+    members = groups['size']
+    edges = members * (members - 1)
+    member_bytes = 2 * (members - 1) * groups['sum']
+
+    if not ordered:
+        edges = edges // 2
+        member_bytes = member_bytes // 2
+
+    # Rows written instead under the hub policy: one Collaboration node, a COLLABORATED_ON row to the publication and a
+    # MEMBER_OF row per distinct member
+    unique_members = df.drop_duplicates([group_column, member_column])
+    unique_lengths = unique_members[member_column].astype(str).str.len()
+    unique_groups = unique_lengths.groupby(unique_members[group_column]).agg(['size', 'sum'])
+
+    group_lengths = pd.Series(groups.index.astype(str).str.len(), index=groups.index)
+    hub_id_lengths = len(hub_prefix) + group_lengths
+    hub_node_bytes = (hub_id_lengths + group_lengths + unique_groups['size'].astype(str).str.len()
+                      + len('Collaboration') + 4)
+    hub_member_of_bytes = unique_groups['sum'] + unique_groups['size'] * (hub_id_lengths + len('MEMBER_OF') + 3)
+    hub_collaborated_on_bytes = hub_id_lengths + group_lengths + len('COLLABORATED_ON') + 3
+
+    result = pd.DataFrame({
+        'members': members,
+        'edges': edges,
+        'bytes': member_bytes + edges * (len(relationship_type) + 3),  # two separators and a line break per row
+        'hub_rows': unique_groups['size'] + 2,
+        'hub_bytes': hub_node_bytes + hub_member_of_bytes + hub_collaborated_on_bytes,
+    })
+
+    return result.sort_values('edges', ascending=False)
+
+
+def project_collaboration_edges(
+        estimate: pd.DataFrame,
+        max_group_size: Optional[int] = None,
+        policy: str = 'cap',
+) -> tuple[int, int]:
+    # Rows and bytes written after the policy for large groups, capped groups keep the bytes per edge of the full group
+    # and hub groups count their Collaboration node, COLLABORATED_ON and MEMBER_OF rows
+    edges = estimate['edges'].astype(float)
+    size_bytes = estimate['bytes'].astype(float)
+
+    if max_group_size is not None:
+        large = estimate['members'] > max_group_size
+
+        if policy == 'cap':
+            ratio = (max_group_size * (max_group_size - 1)) / (estimate['members'] * (estimate['members'] - 1))
+            edges = edges.where(~large, edges * ratio)
+            size_bytes = size_bytes.where(~large, size_bytes * ratio)
+        elif policy == 'hub':
+            edges = edges.where(~large, estimate['hub_rows'])
+            size_bytes = size_bytes.where(~large, estimate['hub_bytes'])
+        else:
+            edges = edges.where(~large, 0)
+            size_bytes = size_bytes.where(~large, 0)
+
+    return int(edges.sum()), int(size_bytes.sum())
+
+
+def format_collaboration_report(stage: str, estimate: pd.DataFrame, top: int = 10) -> str:
+    lines = [
+        f'{stage}: {int(estimate["edges"].sum())} edges, {int(estimate["bytes"].sum())} bytes '
+        f'from {len(estimate)} groups',
+    ]
+
+    for group, row in estimate.head(top).iterrows():
+        lines.append(f'  {group}: {row["members"]} members, {row["edges"]} edges, {row["bytes"]} bytes')
+
+    return '\n'.join(lines)
+
+
+def check_collaboration_budget(
+        estimates: dict[str, pd.DataFrame],
+        max_group_size: Optional[int] = None,
+        policy: str = 'cap',
+        max_edges: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+) -> None:
+    if policy not in COLLABORATION_POLICIES:
+        raise ValueError(f'Unknown collaboration policy {policy!r}, expected one of {COLLABORATION_POLICIES}')
+
+    for stage, estimate in estimates.items():
+        edges, size_bytes = project_collaboration_edges(estimate, max_group_size, policy)
+
+        if (max_edges is not None and edges > max_edges) or (max_bytes is not None and size_bytes > max_bytes):
+            raise ValueError(
+                f'{stage} would produce {edges} edges and {size_bytes} bytes, '
+                f'exceeding the budget of {max_edges} edges and {max_bytes} bytes\n'
+                f'{format_collaboration_report(stage, estimate)}'
+            )
+
+
+def limit_collaboration_groups(
+        df: pd.DataFrame,
+        group_column: str,
+        max_group_size: Optional[int] = None,
+        policy: str = 'cap',
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # Returns the rows to expand into pairs and, for the hub policy, the rows of large groups
+    if max_group_size is None:
+        return df, df.iloc[0:0]
+
+    if policy == 'cap':
+        return df[df.groupby(group_column).cumcount() < max_group_size], df.iloc[0:0]
+
+    large = df.groupby(group_column)[group_column].transform('size') > max_group_size
+
+    if policy == 'skip':
+        return df[~large], df.iloc[0:0]
+
+    return df[~large], df[large]
+
+
+def write_collaboration_hubs(
+        df: pd.DataFrame,
+        group_column: str,
+        member_column: str,
+        output_dir: Path,
+        name: str,
+        member_of_name: str,
+        collaborated_on_name: str,
+        member_space: str = '',
+        hub_space: str = '',
+        group_space: str = '',
+        hub_prefix: str = COLLABORATION_HUB_PREFIX,
+) -> None:
+    # One Collaboration node per large group, connected to its publication and to its members instead of all pairs of
+    # members
+    hubs = df.groupby(group_column)[member_column].nunique().rename('members').reset_index()
+    hubs['collaboration_ID'] = hub_prefix + hubs[group_column].astype(str)
+    hubs[':LABEL'] = 'Collaboration'
+
+    hubs_header = f'{id_field("collaboration_ID:ID", hub_space)},publication_ID,members:int,:LABEL'
+    hubs_header_path = output_dir / f'{name}_header.csv'
+    hubs_content_path = output_dir / f'{name}.csv'
+
+    with open(hubs_header_path, 'w') as f:
+        f.write(hubs_header)
+    hubs.to_csv(hubs_content_path, index=False, header=False,
+                columns=['collaboration_ID', group_column, 'members', ':LABEL'])
+
+    member_of = df[[member_column, group_column]].drop_duplicates()
+    member_of['collaboration_ID'] = hub_prefix + member_of[group_column].astype(str)
+    member_of[':TYPE'] = 'MEMBER_OF'
+
+    member_of_header = f'{id_field(":START_ID", member_space)},{id_field(":END_ID", hub_space)},:TYPE'
+    member_of_header_path = output_dir / f'{member_of_name}_header.csv'
+    member_of_content_path = output_dir / f'{member_of_name}.csv'
+
+    with open(member_of_header_path, 'w') as f:
+        f.write(member_of_header)
+    member_of.to_csv(member_of_content_path, index=False, header=False,
+                     columns=[member_column, 'collaboration_ID', ':TYPE'])
+
+    collaborated_on = hubs[['collaboration_ID', group_column]].copy()
+    collaborated_on[':TYPE'] = 'COLLABORATED_ON'
+
+    collaborated_on_header = f'{id_field(":START_ID", hub_space)},{id_field(":END_ID", group_space)},:TYPE'
+    collaborated_on_header_path = output_dir / f'{collaborated_on_name}_header.csv'
+    collaborated_on_content_path = output_dir / f'{collaborated_on_name}.csv'
+
+    with open(collaborated_on_header_path, 'w') as f:
+        f.write(collaborated_on_header)
+    collaborated_on.to_csv(collaborated_on_content_path, index=False, header=False)
@@ -1,3 +1,4 @@
+import argparse
 import itertools
 from ast import literal_eval
 from pathlib import Path
@@ -5,6 +6,69 @@ from typing import Iterable, Optional
 
 import pandas as pd
 
+from cli import positive_fraction, positive_int
+from collaborations import (
+    COLLABORATION_POLICIES,
+    check_collaboration_budget,
+    estimate_collaboration_edges,
+    format_collaboration_report,
+    limit_collaboration_groups,
+    write_collaboration_hubs,
+)
+from import_files import read_content_chunks, read_header
+from partitioning import read_publication_buckets, write_partitions
+from sampling import expand_closure, match_categories, sample_ids, write_sample
+
+# Relationship files used to expand sampled publications to the nodes they reference, in order
+SAMPLE_EXPANSIONS = [
+    ('author_of', ':END_ID', ':START_ID'),
+    ('published_in', ':START_ID', ':END_ID'),
+    ('belongs_to', ':START_ID', ':END_ID'),
+    ('works_at', ':START_ID', ':END_ID'),
+    ('author_collaborations_member_of', ':END_ID', ':START_ID'),
+    ('affiliation_collaborations_member_of', ':END_ID', ':START_ID'),
+]
+
+AUTHOR_HUB_PREFIX = 'author-'
+AFFILIATION_HUB_PREFIX = 'affiliation-'
+
+IMPORT_FILES = [
+    'venues',
+    'authors',
+    'affiliations',
+    'publications',
+    'domains',
+    'author_of',
+    'author_collaborates_with',
+    'works_at',
+    'published_in',
+    'belongs_to',
+    'cited_by',
+    'covers',
+    'affiliation_collaborates_with',
+    'affiliation_publishes_in',
+]
+
+COLLABORATION_HUB_FILES = [
+    'author_collaborations',
+    'author_collaborations_member_of',
+    'author_collaborations_collaborated_on',
+    'affiliation_collaborations',
+    'affiliation_collaborations_member_of',
+    'affiliation_collaborations_collaborated_on',
+]
+
+# Publication-centric files that are split by publication year in the partitioned output mode
+PARTITIONED_FILES = [
+    'publications',
+    'author_of',
+    'cited_by',
+    'published_in',
+    'belongs_to',
+    'author_collaborations_collaborated_on',
+    'affiliation_collaborations_collaborated_on',
+]
+
 
 def save_str_to_file(data: str, file_path: Path | str) -> None:
     with open(file_path, 'w') as f:
@@ -218,9 +282,22 @@ def process_author_of_relationships(df: pd.DataFrame, output_dir: Path):
     save_df_to_file(df, content_path, columns=columns)
 
 
-def process_author_collaborates_with_relationships(df: pd.DataFrame, output_dir: Path):
+def process_author_collaborates_with_relationships(
+        df: pd.DataFrame,
+        output_dir: Path,
+        max_group_size: Optional[int] = None,
+        policy: str = 'cap',
+):
     df = df[['author_ID', 'publication_ID']]
 
+    df, hubs_df = limit_collaboration_groups(df, 'publication_ID', max_group_size, policy)
+
+    if policy == 'hub':
+        write_collaboration_hubs(
+            hubs_df, 'publication_ID', 'author_ID', output_dir, 'author_collaborations',
+            'author_collaborations_member_of', 'author_collaborations_collaborated_on', member_space='Author-ID',
+            hub_space='Collaboration-ID', group_space='Publication-ID', hub_prefix=AUTHOR_HUB_PREFIX)
+
     result = pd.DataFrame(columns=['author_ID_1', 'author_ID_2'])
 
     for publication_id, publication_df in df.groupby('publication_ID'):
@@ -357,11 +434,12 @@ def process_publication_cited_by_relationships(citations_path: Path, publication
     # Removing publications that are not in the publications.csv file
     df = df.merge(pub_df, left_on='citing_publication_DOI', right_on='DOI')
 
-    df = df[['publication_ID_x', 'citing_publication_DOI']]
+    # The citing publication is referenced by its publication ID, DOIs are not in the Publication-ID space
+    df = df[['publication_ID_x', 'publication_ID_y']]
 
     df = df.rename(columns={
         'publication_ID_x': ':START_ID(Publication-ID)',
-        'citing_publication_DOI': ':END_ID(Publication-ID)',
+        'publication_ID_y': ':END_ID(Publication-ID)',
     })
 
     df[':TYPE'] = 'CITED_BY'
@@ -421,11 +499,7 @@ def process_affiliation_covers_scientific_domain_relationships(
     save_df_to_file(df, content_path, columns=columns)
 
 
-def process_affiliation_collaborates_with_relationships(
-        author_to_publications_path: Path,
-        publications_to_affiliations_path: Path,
-        output_dir: Path
-):
+def read_affiliation_collaborators(author_to_publications_path: Path, publications_to_affiliations_path: Path):
     # author_ID, publication_ID
     author_to_publications_df = pd.read_csv(
         author_to_publications_path, sep=infer_separator(author_to_publications_path), index_col=0)
@@ -439,6 +513,26 @@ def process_affiliation_collaborates_with_relationships(
     # author_ID, publication_ID, affiliation_ID
     df = author_to_publications_df.merge(publications_to_affiliations_df, on='publication_ID')
 
+    # publication_ID, affiliation_ID, unique affiliations per publication
+    return df[['publication_ID', 'affiliation_ID']].drop_duplicates()
+
+
+def process_affiliation_collaborates_with_relationships(
+        df: pd.DataFrame,
+        output_dir: Path,
+        max_group_size: Optional[int] = None,
+        policy: str = 'cap',
+):
+    # df: publication_ID, affiliation_ID, see read_affiliation_collaborators
+    df, hubs_df = limit_collaboration_groups(df, 'publication_ID', max_group_size, policy)
+
+    if policy == 'hub':
+        write_collaboration_hubs(
+            hubs_df, 'publication_ID', 'affiliation_ID', output_dir, 'affiliation_collaborations',
+            'affiliation_collaborations_member_of', 'affiliation_collaborations_collaborated_on',
+            member_space='Affiliation-ID', hub_space='Collaboration-ID', group_space='Publication-ID',
+            hub_prefix=AFFILIATION_HUB_PREFIX)
+
     collaboration_df = pd.DataFrame(columns=[':START_ID(Affiliation-ID)', ':END_ID(Affiliation-ID)', ':TYPE'])
 
     for _, group in df.groupby('publication_ID'):
@@ -506,10 +600,117 @@ def process_affiliation_publishes_in_relationships(
     save_df_to_file(df, content_path, columns=columns)
 
 
+def select_sample_publications(
+        output_dir: Path,
+        fraction: Optional[float] = None,
+        categories: Optional[Iterable[str]] = None,
+        years: Optional[Iterable[int]] = None,
+        seed: int = 0,
+) -> set[str]:
+    header = read_header(output_dir / 'publications_header.csv')
+    id_position = header.index('publication_ID:ID(Publication-ID)')
+    year_position = header.index('year:int')
+
+    publication_ids = []
+    for chunk in read_content_chunks(output_dir / 'publications.csv', usecols=[id_position, year_position]):
+        if years:
+            chunk = chunk[chunk[year_position].isin({str(year) for year in years})]
+        publication_ids.extend(chunk[id_position])
+
+    if categories:
+        category_publication_ids = set()
+        for chunk in read_content_chunks(output_dir / 'belongs_to.csv', usecols=[0, 1]):
+            category_publication_ids.update(chunk.loc[match_categories(chunk[1], categories), 0])
+
+        publication_ids = [id_ for id_ in publication_ids if id_ in category_publication_ids]
+
+    return sample_ids(publication_ids, fraction, seed)
+
+
+def import_file_names(collaboration_policy: str = 'cap') -> list[str]:
+    # Files written by a run with the given options, stale files of earlier runs must not be sampled or partitioned
+    if collaboration_policy == 'hub':
+        return IMPORT_FILES + COLLABORATION_HUB_FILES
+
+    return IMPORT_FILES
+
+
+def process_sample(
+        output_dir: Path,
+        sample_dir: Path,
+        names: list[str],
+        fraction: Optional[float] = None,
+        categories: Optional[Iterable[str]] = None,
+        years: Optional[Iterable[int]] = None,
+        seed: int = 0,
+) -> dict[str, int]:
+    publication_ids = select_sample_publications(output_dir, fraction, categories, years, seed)
+
+    # Collaboration hubs are seeded from the sampled publications and expanded to all of their members, hubs of other
+    # publications would keep only part of their MEMBER_OF rows
+    hub_ids = {prefix + id_ for prefix in (AUTHOR_HUB_PREFIX, AFFILIATION_HUB_PREFIX) for id_ in publication_ids}
+    closure = expand_closure(
+        output_dir, {'Publication-ID': publication_ids, 'Collaboration-ID': hub_ids}, SAMPLE_EXPANSIONS)
+
+    return write_sample(output_dir, sample_dir, names, closure)
+
+
+def process_partitions(output_dir: Path, partitions_dir: Path, names: list[str], bucket_years: int = 1) -> dict:
+    publication_buckets = read_publication_buckets(
+        output_dir / 'publications_header.csv', output_dir / 'publications.csv', bucket_years)
+
+    return write_partitions(
+        output_dir, partitions_dir, names, PARTITIONED_FILES, publication_buckets, bucket_years)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sample-fraction', type=positive_fraction, help='Random fraction of publications to sample')
+    parser.add_argument('--sample-categories', nargs='+', help='arXiv categories or archives to sample')
+    parser.add_argument('--sample-years', nargs='+', type=int, help='Publication years to sample')
+    parser.add_argument('--sample-seed', type=int, default=0)
+    parser.add_argument('--sample-dir', type=Path, default=Path('../import/enriched/sample'))
+    parser.add_argument('--partition-years', type=positive_int,
+                        help='Partition publication files by buckets of this many years')
+    parser.add_argument('--partition-dir', type=Path, default=Path('../import/enriched/partitions'))
+    parser.add_argument('--max-collaboration-size', type=positive_int, help='Largest publication expanded into pairs')
+    parser.add_argument('--collaboration-policy', choices=COLLABORATION_POLICIES, default='cap',
+                        help='Policy for publications above --max-collaboration-size')
+    parser.add_argument('--max-collaboration-edges', type=int, help='Fail if a stage would produce more edges')
+    parser.add_argument('--max-collaboration-bytes', type=int, help='Fail if a stage would produce more bytes')
+
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
+    args = parse_args()
+
     output_dir = Path('../import/enriched')
     output_dir.mkdir(exist_ok=True)
 
+    author_to_publications_path = Path('../dataset/enriched/author2pub.csv')
+    a2p_df = pd.read_csv(author_to_publications_path, index_col=0)
+
+    publications_to_affiliations_path = Path('../dataset/enriched/pub2affiliation.csv')
+    affiliation_collaborators_df = read_affiliation_collaborators(
+        author_to_publications_path, publications_to_affiliations_path)
+
+    # Pair expansion is quadratic in the group size, so its cost is estimated before any output is written. Affiliation
+    # pairs are deduplicated across publications only after the expansion, so their estimate is an upper bound.
+    collaboration_estimates = {
+        'author COLLABORATES_WITH': estimate_collaboration_edges(
+            a2p_df, 'publication_ID', 'author_ID', 'COLLABORATES_WITH', hub_prefix=AUTHOR_HUB_PREFIX),
+        'affiliation COLLABORATES_WITH (before deduplication)': estimate_collaboration_edges(
+            affiliation_collaborators_df, 'publication_ID', 'affiliation_ID', 'COLLABORATES_WITH',
+            hub_prefix=AFFILIATION_HUB_PREFIX),
+    }
+    for stage, estimate in collaboration_estimates.items():
+        print(format_collaboration_report(stage, estimate))
+
+    check_collaboration_budget(
+        collaboration_estimates, args.max_collaboration_size, args.collaboration_policy,
+        args.max_collaboration_edges, args.max_collaboration_bytes)
+
     venues_path = Path('../dataset/enriched/venues.csv')
     process_venue_entities(venues_path, output_dir)
 
@@ -526,10 +727,9 @@ if __name__ == '__main__':
     domains_path = Path('../dataset/enriched/lookup_table_domains.csv')
     process_scientific_domain_entities(domains_path, output_dir)
 
-    author_to_publications_path = Path('../dataset/enriched/author2pub.csv')
-    a2p_df = pd.read_csv(author_to_publications_path, index_col=0)
     process_author_of_relationships(a2p_df, output_dir)
-    process_author_collaborates_with_relationships(a2p_df, output_dir)
+    process_author_collaborates_with_relationships(
+        a2p_df, output_dir, args.max_collaboration_size, args.collaboration_policy)
 
     author_to_affiliations_path = Path('../dataset/enriched/author2affiliation.csv')
     process_author_works_at_relationships(author_to_affiliations_path, output_dir)
@@ -544,12 +744,20 @@ if __name__ == '__main__':
     citations_path = Path('../dataset/enriched/citing_pub_df200000.tsv')
     process_publication_cited_by_relationships(citations_path, publications_path, output_dir)
 
-    publications_to_affiliations_path = Path('../dataset/enriched/pub2affiliation.csv')
     process_affiliation_covers_scientific_domain_relationships(
         publications_to_affiliations_path, publications_to_domains_path, output_dir)
 
     process_affiliation_collaborates_with_relationships(
-        author_to_publications_path, publications_to_affiliations_path, output_dir)
+        affiliation_collaborators_df, output_dir, args.max_collaboration_size, args.collaboration_policy)
 
     process_affiliation_publishes_in_relationships(
         publications_to_affiliations_path, publications_to_venues_path, output_dir)
+
+    if args.sample_fraction is not None or args.sample_categories or args.sample_years:
+        process_sample(
+            output_dir, args.sample_dir, import_file_names(args.collaboration_policy), args.sample_fraction,
+            args.sample_categories, args.sample_years, args.sample_seed)
+
+    if args.partition_years:
+        process_partitions(
+            output_dir, args.partition_dir, import_file_names(args.collaboration_policy), args.partition_years)
@@ -1,8 +1,52 @@
+import argparse
 import json
 from pathlib import Path
+from typing import Iterable, Optional
 
 import pandas as pd
 
+from cli import confidence, positive_fraction, positive_int
+from collaborations import (
+    COLLABORATION_HUB_PREFIX,
+    COLLABORATION_POLICIES,
+    check_collaboration_budget,
+    estimate_collaboration_edges,
+    format_collaboration_report,
+    limit_collaboration_groups,
+    write_collaboration_hubs,
+)
+from sampling import expand_closure, match_categories, sample_ids, write_sample
+from venue_resolver import VenueIndex, build_venue_index, resolve_venues
+
+# Relationship files used to expand sampled publications to the nodes they reference, in order
+SAMPLE_EXPANSIONS = [
+    ('author_publication_rel', ':END_ID', ':START_ID'),
+    ('publication_venue_rel', ':START_ID', ':END_ID'),
+    ('publication_venue_unresolved_rel', ':START_ID', ':END_ID'),
+    ('collaboration_member_of_rel', ':END_ID', ':START_ID'),
+]
+
+IMPORT_FILES = [
+    'authors',
+    'publications',
+    'venues',
+    'author_publication_rel',
+    'author_venue_rel',
+    'author_author_rel',
+    'publication_venue_rel',
+]
+
+RESOLVED_VENUE_FILES = [
+    'resolved_venues',
+    'publication_venue_unresolved_rel',
+]
+
+COLLABORATION_HUB_FILES = [
+    'collaborations',
+    'collaboration_member_of_rel',
+    'collaboration_publication_rel',
+]
+
 
 def read_sample(data_path: Path | str) -> pd.DataFrame:
     df = pd.DataFrame()
@@ -76,7 +120,12 @@ def process_author_entities(df: pd.DataFrame, output_dir: Path) -> None:
     save_df_to_file(authors, authors_content_path)
 
 
-def process_author_relationships(df: pd.DataFrame, output_dir: Path) -> None:
+def process_author_relationships(
+        df: pd.DataFrame,
+        output_dir: Path,
+        max_group_size: Optional[int] = None,
+        policy: str = 'cap',
+) -> None:
     # Author -> Publication, AUTHOR_OF
 
     author_publication = df[['authors_parsed', 'id']]
@@ -106,8 +155,15 @@ def process_author_relationships(df: pd.DataFrame, output_dir: Path) -> None:
 
     # Author -> Author, CO_AUTHOR
 
+    co_authors, hubs = limit_collaboration_groups(df[['authors_parsed', 'id']], 'id', max_group_size, policy)
+
+    if policy == 'hub':
+        write_collaboration_hubs(
+            hubs, 'id', 'authors_parsed', output_dir, 'collaborations', 'collaboration_member_of_rel',
+            'collaboration_publication_rel')
+
     author_author = pd.DataFrame(columns=[':START_ID', ':END_ID', ':TYPE'])
-    for (pub_id, group) in df.groupby('id'):
+    for (pub_id, group) in co_authors.groupby('id'):
         authors = group['authors_parsed'].tolist()
         for i in range(len(authors)):
             for j in range(i + 1, len(authors)):
@@ -140,9 +196,18 @@ def process_publication_entities(df: pd.DataFrame, output_dir: Path) -> None:
     save_df_to_file(publications, publications_content_path)
 
 
-def process_publication_relationships(df: pd.DataFrame, output_dir: Path) -> None:
+def process_publication_relationships(
+        df: pd.DataFrame,
+        output_dir: Path,
+        venue_index: Optional[VenueIndex] = None,
+        min_venue_confidence: float = 0.0,
+) -> None:
     # Publication -> Venue, PUBLISHED_IN
 
+    if venue_index is not None:
+        process_resolved_publication_relationships(df, output_dir, venue_index, min_venue_confidence)
+        return
+
     publication_venue = df[['id', 'journal-ref']]
     publication_venue = publication_venue.rename(columns={'id': ':START_ID', 'journal-ref': ':END_ID'})
     publication_venue[':TYPE'] = 'PUBLISHED_IN'
@@ -156,6 +221,71 @@ def process_publication_relationships(df: pd.DataFrame, output_dir: Path) -> Non
     publication_venue.to_csv(publication_venue_content_path, index=False, header=False, mode='w')
 
 
+def process_resolved_publication_relationships(
+        df: pd.DataFrame,
+        output_dir: Path,
+        venue_index: VenueIndex,
+        min_venue_confidence: float = 0.0,
+) -> None:
+    # Publication -> Venue, PUBLISHED_IN, pointing to the enriched Venue-ID space instead of the raw journal-refs
+
+    publication_venue = df[['id', 'journal-ref']].drop_duplicates(subset=['id']).dropna()
+    matches = resolve_venues(publication_venue['journal-ref'], venue_index)
+
+    publication_venue = publication_venue.assign(
+        venue_ID=matches['venue_ID'].values,
+        match_type=matches['match_type'].values,
+        confidence=matches['confidence'].values,
+    )
+    resolved = publication_venue['venue_ID'].notna() & (publication_venue['confidence'] >= min_venue_confidence)
+
+    resolved_venue = publication_venue[resolved]
+    resolved_venue = resolved_venue.rename(columns={'id': ':START_ID', 'venue_ID': ':END_ID(Venue-ID)'})
+    resolved_venue[':TYPE'] = 'PUBLISHED_IN'
+
+    resolved_venue_header = ':START_ID,:END_ID(Venue-ID),:TYPE,match_type,confidence:float'
+    resolved_venue_content_path = output_dir / 'publication_venue_rel.csv'
+    resolved_venue_header_path = output_dir / 'publication_venue_rel_header.csv'
+
+    columns = [':START_ID', ':END_ID(Venue-ID)', ':TYPE', 'match_type', 'confidence']
+
+    save_str_to_file(resolved_venue_header, resolved_venue_header_path)
+    resolved_venue.to_csv(resolved_venue_content_path, index=False, header=False, mode='w', columns=columns)
+
+    # Publication -> Venue, PUBLISHED_IN_UNRESOLVED, to the raw venue of journal-refs without a confident match
+
+    unresolved_venue = publication_venue[~resolved]
+    unresolved_venue = unresolved_venue.assign(
+        venue=unresolved_venue['journal-ref'].apply(lambda x: x.split(',')[0].strip()))
+    unresolved_venue = unresolved_venue.rename(columns={'id': ':START_ID', 'venue': ':END_ID'})
+    unresolved_venue[':TYPE'] = 'PUBLISHED_IN_UNRESOLVED'
+
+    unresolved_venue_header = ':START_ID,:END_ID,:TYPE'
+    unresolved_venue_content_path = output_dir / 'publication_venue_unresolved_rel.csv'
+    unresolved_venue_header_path = output_dir / 'publication_venue_unresolved_rel_header.csv'
+
+    columns = [':START_ID', ':END_ID', ':TYPE']
+
+    save_str_to_file(unresolved_venue_header, unresolved_venue_header_path)
+    unresolved_venue.to_csv(unresolved_venue_content_path, index=False, header=False, mode='w', columns=columns)
+
+    # Enriched Venue nodes referenced by the resolved edges, so that the raw import has no dangling Venue-ID
+
+    full_names = dict(zip(venue_index.venue_ids, venue_index.full_names))
+
+    resolved_venues = resolved_venue[[':END_ID(Venue-ID)']].drop_duplicates()
+    resolved_venues = resolved_venues.rename(columns={':END_ID(Venue-ID)': 'venue_ID'})
+    resolved_venues['full_name'] = resolved_venues['venue_ID'].map(full_names)
+    resolved_venues[':LABEL'] = 'Venue'
+
+    resolved_venues_header = 'venue_ID:ID(Venue-ID),full_name,:LABEL'
+    resolved_venues_content_path = output_dir / 'resolved_venues.csv'
+    resolved_venues_header_path = output_dir / 'resolved_venues_header.csv'
+
+    save_str_to_file(resolved_venues_header, resolved_venues_header_path)
+    resolved_venues.to_csv(resolved_venues_content_path, index=False, header=False, mode='w')
+
+
 def process_venue_entities(df: pd.DataFrame, output_dir: Path) -> None:
     venues = extract_venues(df)
 
@@ -168,11 +298,99 @@ def process_venue_entities(df: pd.DataFrame, output_dir: Path) -> None:
     save_df_to_file(venues, venues_content_path)
 
 
+def select_sample_publications(
+        df: pd.DataFrame,
+        fraction: Optional[float] = None,
+        categories: Optional[Iterable[str]] = None,
+        years: Optional[Iterable[int]] = None,
+        seed: int = 0,
+) -> set[str]:
+    publications = df[['id', 'categories', 'update_date']].drop_duplicates(subset=['id'])
+
+    if years:
+        publications = publications[publications['update_date'].str[:4].isin({str(year) for year in years})]
+
+    if categories:
+        publication_categories = publications[['id', 'categories']].dropna()
+        publication_categories['categories'] = publication_categories['categories'].str.split()
+        publication_categories = publication_categories.explode('categories')
+
+        selected = publication_categories.loc[match_categories(publication_categories['categories'], categories), 'id']
+        publications = publications[publications['id'].isin(set(selected))]
+
+    return sample_ids(publications['id'], fraction, seed)
+
+
+def import_file_names(resolve_venues: bool = False, collaboration_policy: str = 'cap') -> list[str]:
+    # Files written by a run with the given options, stale files of earlier runs must not be sampled
+    names = list(IMPORT_FILES)
+
+    if resolve_venues:
+        names += RESOLVED_VENUE_FILES
+    if collaboration_policy == 'hub':
+        names += COLLABORATION_HUB_FILES
+
+    return names
+
+
+def process_sample(
+        df: pd.DataFrame,
+        output_dir: Path,
+        sample_dir: Path,
+        names: list[str],
+        fraction: Optional[float] = None,
+        categories: Optional[Iterable[str]] = None,
+        years: Optional[Iterable[int]] = None,
+        seed: int = 0,
+) -> dict[str, int]:
+    publication_ids = select_sample_publications(df, fraction, categories, years, seed)
+
+    # Collaboration hubs are seeded from the sampled publications and expanded to all of their members, hubs of other
+    # publications would keep only part of their MEMBER_OF rows
+    hub_ids = {COLLABORATION_HUB_PREFIX + id_ for id_ in publication_ids}
+    closure = expand_closure(output_dir, {'': publication_ids | hub_ids}, SAMPLE_EXPANSIONS)
+
+    return write_sample(output_dir, sample_dir, names, closure)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sample-fraction', type=positive_fraction, help='Random fraction of publications to sample')
+    parser.add_argument('--sample-categories', nargs='+', help='arXiv categories or archives to sample')
+    parser.add_argument('--sample-years', nargs='+', type=int, help='Update years to sample')
+    parser.add_argument('--sample-seed', type=int, default=0)
+    parser.add_argument('--sample-dir', type=Path, default=Path('../import/sample'))
+    parser.add_argument('--resolve-venues', type=Path, metavar='VENUES_CSV',
+                        help='Resolve journal-refs to the Venue-ID space of this enriched venues.csv')
+    parser.add_argument('--min-venue-confidence', type=confidence, default=0.0,
+                        help='Journal-refs resolved with a lower confidence are kept as PUBLISHED_IN_UNRESOLVED')
+    parser.add_argument('--max-collaboration-size', type=positive_int, help='Largest publication expanded into pairs')
+    parser.add_argument('--collaboration-policy', choices=COLLABORATION_POLICIES, default='cap',
+                        help='Policy for publications above --max-collaboration-size')
+    parser.add_argument('--max-collaboration-edges', type=int, help='Fail if a stage would produce more edges')
+    parser.add_argument('--max-collaboration-bytes', type=int, help='Fail if a stage would produce more bytes')
+
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
+    args = parse_args()
+
     data_path = Path('../dataset/sample.json')
 
     df = read_sample(data_path)
 
+    # Pair expansion is quadratic in the group size, so its cost is estimated before any output is written
+    collaboration_estimates = {
+        'CO_AUTHOR': estimate_collaboration_edges(df, 'id', 'authors_parsed', 'CO_AUTHOR', ordered=False),
+    }
+    for stage, estimate in collaboration_estimates.items():
+        print(format_collaboration_report(stage, estimate))
+
+    check_collaboration_budget(
+        collaboration_estimates, args.max_collaboration_size, args.collaboration_policy,
+        args.max_collaboration_edges, args.max_collaboration_bytes)
+
     output_dir = Path('../import')
     output_dir.mkdir(exist_ok=True)
 
@@ -180,5 +398,13 @@ if __name__ == '__main__':
     process_publication_entities(df, output_dir)
     process_venue_entities(df, output_dir)
 
-    process_author_relationships(df, output_dir)
-    process_publication_relationships(df, output_dir)
+    venue_index = build_venue_index(args.resolve_venues) if args.resolve_venues is not None else None
+
+    process_author_relationships(df, output_dir, args.max_collaboration_size, args.collaboration_policy)
+    process_publication_relationships(df, output_dir, venue_index, args.min_venue_confidence)
+
+    if args.sample_fraction is not None or args.sample_categories or args.sample_years:
+        names = import_file_names(venue_index is not None, args.collaboration_policy)
+        process_sample(
+            df, output_dir, args.sample_dir, names, args.sample_fraction, args.sample_categories, args.sample_years,
+            args.sample_seed)
@@ -0,0 +1,84 @@
+import re
+import shutil
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+
+# Matches neo4j-admin import header fields, e.g., "author_ID:ID(Author-ID)", ":START_ID" or ":END_ID(Venue-ID)"
+ID_FIELD_PATTERN = re.compile(r'^(?:.*:ID|:START_ID|:END_ID)(?:\((?P<space>[^)]*)\))?$')
+
+HEADER_SUFFIX = '_header'
+
+# Written into every derived directory, only directories holding it are ever wiped
+GENERATED_MARKER = '.generated'
+
+
+def read_header(header_path: Path) -> list[str]:
+    with open(header_path) as f:
+        return f.read().strip().split(',')
+
+
+def id_columns(header: list[str]) -> dict[int, str]:
+    # Column position -> ID space, the default (global) ID space is an empty string
+    result = {}
+
+    for position, field in enumerate(header):
+        match = ID_FIELD_PATTERN.match(field)
+        if match:
+            result[position] = match.group('space') or ''
+
+    return result
+
+
+def is_relationship_header(header: list[str]) -> bool:
+    return any(field.startswith(':START_ID') for field in header)
+
+
+def list_import_files(output_dir: Path, names: Iterable[str]) -> list[tuple[str, Path, Path]]:
+    # Only the given files are listed, files left in output_dir by earlier runs with other options are ignored
+    result = []
+
+    for name in names:
+        header_path = output_dir / f'{name}{HEADER_SUFFIX}.csv'
+        content_path = output_dir / f'{name}.csv'
+
+        if header_path.exists() and content_path.exists():
+            result.append((name, header_path, content_path))
+
+    return result
+
+
+def reset_dir(path: Path, output_dir: Path) -> None:
+    # Derived directories are rebuilt from scratch, refusing to wipe the import files they are derived from or any
+    # non-empty directory that was not written by these tools, e.g., a mistyped --sample-dir ../dataset
+    if output_dir.resolve().is_relative_to(path.resolve()):
+        raise ValueError(f'{path} contains the import files in {output_dir} and cannot be reset')
+
+    if path.exists():
+        if not (path / GENERATED_MARKER).exists() and any(path.iterdir()):
+            raise ValueError(f'{path} is not empty and was not written by this tool, refusing to reset it')
+
+        shutil.rmtree(path)
+
+    path.mkdir(parents=True)
+    (path / GENERATED_MARKER).touch()
+
+
+def read_content_chunks(
+        content_path: Path,
+        usecols: Optional[list[int]] = None,
+        chunksize: int = 1_000_000,
+) -> Iterator[pd.DataFrame]:
+    if content_path.stat().st_size == 0:
+        return iter([])
+
+    # Values are kept as strings to write them back unchanged and to compare IDs across files
+    return pd.read_csv(
+        content_path,
+        header=None,
+        usecols=usecols,
+        dtype=str,
+        keep_default_na=False,
+        chunksize=chunksize,
+    )
@@ -0,0 +1,136 @@
+import json
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from import_files import id_columns, list_import_files, read_content_chunks, read_header, reset_dir
+
+UNKNOWN_PARTITION = 'unknown'
+
+
+def partition_label(bucket_start: int, bucket_years: int) -> str:
+    if bucket_start < 0:
+        return UNKNOWN_PARTITION
+
+    if bucket_years == 1:
+        return str(bucket_start)
+
+    return f'{bucket_start}-{bucket_start + bucket_years - 1}'
+
+
+def partition_years(bucket_start: int, bucket_years: int) -> Optional[list[int]]:
+    if bucket_start < 0:
+        return None
+
+    return [bucket_start, bucket_start + bucket_years - 1]
+
+
+def read_publication_buckets(
+        publications_header_path: Path,
+        publications_path: Path,
+        bucket_years: int = 1,
+        year_field: str = 'year:int',
+) -> dict[str, int]:
+    # Publication ID -> first year of its time bucket
+    header = read_header(publications_header_path)
+    id_position = next(iter(id_columns(header)))
+    year_position = header.index(year_field)
+
+    result = {}
+    for chunk in read_content_chunks(publications_path, usecols=[id_position, year_position]):
+        years = pd.to_numeric(chunk[year_position], errors='coerce').dropna().astype(int)
+        buckets = years // bucket_years * bucket_years
+        result.update(zip(chunk.loc[buckets.index, id_position], buckets))
+
+    return result
+
+
+def write_partitions(
+        output_dir: Path,
+        partitions_dir: Path,
+        names: list[str],
+        partitioned_names: list[str],
+        publication_buckets: dict[str, int],
+        bucket_years: int = 1,
+        publication_space: str = 'Publication-ID',
+        chunksize: int = 1_000_000,
+) -> dict:
+    # A row goes to the latest bucket among its publication endpoints, e.g., a citation to the citing publication's
+    # year, or to the unknown partition if any endpoint has no year. Older buckets of the other endpoints are recorded
+    # as dependencies of the partition, e.g., citations in a five-year window to publications outside of it.
+    reset_dir(partitions_dir, output_dir)
+
+    partitions = {}
+    dependencies = {}
+
+    for name, header_path, content_path in list_import_files(output_dir, partitioned_names):
+        header = read_header(header_path)
+        positions = [position for position, space in id_columns(header).items() if space == publication_space]
+
+        for chunk in read_content_chunks(content_path, chunksize=chunksize):
+            endpoint_buckets = pd.concat(
+                [chunk[position].map(publication_buckets) for position in positions], axis=1).fillna(-1).astype(int)
+            buckets = endpoint_buckets.max(axis=1).where((endpoint_buckets >= 0).all(axis=1), -1)
+
+            for position in endpoint_buckets.columns:
+                pairs = pd.DataFrame({'bucket': buckets, 'dependency': endpoint_buckets[position]})
+                pairs = pairs[pairs['bucket'] != pairs['dependency']].drop_duplicates()
+
+                for bucket_start, dependency_start in pairs.itertuples(index=False):
+                    dependencies.setdefault(partition_label(int(bucket_start), bucket_years), set()).add(
+                        partition_label(int(dependency_start), bucket_years))
+
+            for bucket_start, partition_chunk in chunk.groupby(buckets):
+                bucket_start = int(bucket_start)
+                label = partition_label(bucket_start, bucket_years)
+                partition_dir = partitions_dir / label
+
+                partition = partitions.setdefault(label, {
+                    'partition': label,
+                    'years': partition_years(bucket_start, bucket_years),
+                    'files': {},
+                })
+
+                if name not in partition['files']:
+                    partition_dir.mkdir(exist_ok=True)
+                    shutil.copyfile(header_path, partition_dir / header_path.name)
+                    partition['files'][name] = {
+                        'header': header_path.name,
+                        'content': content_path.name,
+                        'rows': 0,
+                    }
+                    mode = 'w'
+                else:
+                    mode = 'a'
+
+                partition_chunk.to_csv(partition_dir / content_path.name, index=False, header=False, mode=mode)
+                partition['files'][name]['rows'] += len(partition_chunk)
+
+    for label, partition in partitions.items():
+        partition['depends_on'] = sorted(dependencies.get(label, set()))
+
+        with open(partitions_dir / label / 'manifest.json', 'w') as f:
+            json.dump(partition, f, indent=2)
+
+    # Node and relationship files that are not partitioned have to be loaded together with any set of partitions
+    manifest = {
+        'bucket_years': bucket_years,
+        'partitions': {
+            label: {
+                'years': partition['years'],
+                'rows': sum(file['rows'] for file in partition['files'].values()),
+                'depends_on': partition['depends_on'],
+            }
+            for label, partition in sorted(partitions.items())
+        },
+        'shared_files': [
+            name for name, _, _ in list_import_files(output_dir, names) if name not in partitioned_names
+        ],
+    }
+
+    with open(partitions_dir / 'manifest.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
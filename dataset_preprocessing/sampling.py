@@ -0,0 +1,116 @@
+import shutil
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from import_files import (
+    id_columns,
+    is_relationship_header,
+    list_import_files,
+    read_content_chunks,
+    read_header,
+    reset_dir,
+)
+
+
+def sample_ids(ids: Iterable[str], fraction: Optional[float] = None, seed: int = 0) -> set[str]:
+    ids = list(dict.fromkeys(ids))
+
+    if fraction is None:
+        return set(ids)
+
+    keep = np.random.default_rng(seed).random(len(ids)) < fraction
+
+    return {id_ for id_, selected in zip(ids, keep) if selected}
+
+
+def match_categories(categories: pd.Series, selected: Iterable[str]) -> pd.Series:
+    # Both exact arXiv categories ("cs.AI") and whole archives ("cs", "hep-ph") can be selected
+    selected = set(selected)
+    archives = categories.str.split('.').str[0]
+
+    return categories.isin(selected) | archives.isin(selected)
+
+
+def find_field(header: list[str], prefix: str) -> int:
+    return next(position for position, field in enumerate(header) if field.startswith(prefix))
+
+
+def expand_closure(
+        output_dir: Path,
+        seed_ids: dict[str, set[str]],
+        expansions: list[tuple[str, str, str]],
+) -> dict[str, set[str]]:
+    # Seed IDs per ID space, each expansion (relationship file name, known side, new side) reads only the two ID
+    # columns of the file
+    closure = {space: set(ids) for space, ids in seed_ids.items()}
+
+    for name, known_field, new_field in expansions:
+        header_path = output_dir / f'{name}_header.csv'
+        content_path = output_dir / f'{name}.csv'
+
+        if not header_path.exists() or not content_path.exists():
+            continue
+
+        header = read_header(header_path)
+        spaces = id_columns(header)
+
+        known_position = find_field(header, known_field)
+        new_position = find_field(header, new_field)
+
+        known_ids = closure.setdefault(spaces[known_position], set())
+        new_ids = closure.setdefault(spaces[new_position], set())
+
+        for chunk in read_content_chunks(content_path, usecols=[known_position, new_position]):
+            new_ids.update(chunk.loc[chunk[known_position].isin(known_ids), new_position])
+
+    return closure
+
+
+def write_sample(
+        output_dir: Path,
+        sample_dir: Path,
+        names: Iterable[str],
+        closure: dict[str, set[str]],
+        chunksize: int = 1_000_000,
+) -> dict[str, int]:
+    # Nodes are kept if their ID is in the closure. Relationships are kept if both of their endpoints are among the
+    # written nodes, the closure alone may hold IDs without a node, e.g., raw journal-refs that are not venue names.
+    reset_dir(sample_dir, output_dir)
+
+    import_files = [(name, header_path, content_path, read_header(header_path))
+                    for name, header_path, content_path in list_import_files(output_dir, names)]
+    import_files.sort(key=lambda import_file: is_relationship_header(import_file[3]))
+
+    node_ids = {}
+    row_counts = {}
+
+    for name, header_path, content_path, header in import_files:
+        spaces = id_columns(header)
+        is_relationship = is_relationship_header(header)
+
+        shutil.copyfile(header_path, sample_dir / header_path.name)
+
+        sample_content_path = sample_dir / content_path.name
+        sample_content_path.write_text('')
+
+        row_counts[name] = 0
+
+        for chunk in read_content_chunks(content_path, chunksize=chunksize):
+            mask = pd.Series(True, index=chunk.index)
+            for position, space in spaces.items():
+                ids = node_ids.get(space, set()) if is_relationship else closure.get(space, set())
+                mask &= chunk[position].isin(ids)
+
+            chunk = chunk[mask]
+            chunk.to_csv(sample_content_path, index=False, header=False, mode='a')
+
+            if not is_relationship:
+                for position, space in spaces.items():
+                    node_ids.setdefault(space, set()).update(chunk[position])
+
+            row_counts[name] += len(chunk)
+
+    return row_counts
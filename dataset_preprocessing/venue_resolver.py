@@ -0,0 +1,200 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+NON_ALPHA_PATTERN = re.compile(r'[^a-z]+')
+
+# Confidence tiers do not overlap: exact > prefix > fuzzy
+EXACT_CONFIDENCE = 1.0
+PREFIX_MAX_CONFIDENCE = 0.9
+PREFIX_MIN_CONFIDENCE = 0.7
+FUZZY_MAX_CONFIDENCE = 0.7
+
+# Abbreviated journal-refs drop these words, e.g., "J. Math. Phys." for "Journal of Mathematical Physics"
+STOPWORDS = frozenset({'of', 'and', 'the', 'for', 'on', 'in'})
+
+# Trigrams shared by more venues than this are not indexed, e.g., "  j", " of" or "al "
+MAX_TRIGRAM_SHARE = 0.05
+MIN_TRIGRAM_POSTINGS = 100
+
+MIN_SHARED_TRIGRAMS = 2
+
+# Prefix matches must cover this share of the venue name's letters, e.g., "j p" says too little about "journal physics"
+MIN_PREFIX_COVERAGE = 0.3
+
+
+class VenueIndex(NamedTuple):
+    venue_ids: list
+    full_names: list[str]
+    names: list[str]
+    exact: dict[str, int]
+    prefix: dict[tuple, list[int]]
+    trigrams: dict[str, list[int]]
+    trigram_counts: list[int]
+    common_trigrams: frozenset[str]
+
+
+def normalize_venue_name(name: str) -> str:
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return NON_ALPHA_PATTERN.sub(' ', name.lower()).strip()
+
+
+def normalize_journal_ref(journal_ref: str) -> str:
+    # Volumes, pages and years follow the venue name, mostly after the first comma
+    return normalize_venue_name(journal_ref.split(',')[0])
+
+
+def content_tokens(name: str) -> list[str]:
+    return [token for token in name.split() if token not in STOPWORDS]
+
+
+def token_signature(tokens: list[str]) -> tuple:
+    return tuple(token[0] for token in tokens)
+
+
+def name_trigrams(name: str) -> set[str]:
+    padded = f'  {name} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_venue_index(venues_path: Path) -> VenueIndex:
+    df = pd.read_csv(venues_path, index_col=0)
+
+    df = df[['venue_ID', 'full_name']].dropna()
+
+    df['original_name'] = df['full_name'].astype(str)
+    df['full_name'] = df['original_name'].apply(normalize_venue_name)
+    df = df[df['full_name'] != '']
+    df = df.drop_duplicates(subset=['full_name'])
+
+    return index_venue_names(df['venue_ID'].tolist(), df['original_name'].tolist())
+
+
+def index_venue_names(venue_ids: list, full_names: list[str]) -> VenueIndex:
+    names = [normalize_venue_name(name) for name in full_names]
+
+    exact = {}
+    prefix = defaultdict(list)
+    trigrams = defaultdict(list)
+
+    for position, name in enumerate(names):
+        exact[name] = position
+
+        tokens = content_tokens(name)
+        if tokens:
+            prefix[token_signature(tokens)].append(position)
+
+        for gram in name_trigrams(name):
+            trigrams[gram].append(position)
+
+    max_postings = max(MIN_TRIGRAM_POSTINGS, int(MAX_TRIGRAM_SHARE * len(names)))
+    common_trigrams = frozenset(gram for gram, postings in trigrams.items() if len(postings) > max_postings)
+
+    trigrams = {gram: postings for gram, postings in trigrams.items() if gram not in common_trigrams}
+    trigram_counts = [len(name_trigrams(name) - common_trigrams) for name in names]
+
+    return VenueIndex(
+        venue_ids, full_names, names, exact, dict(prefix), trigrams, trigram_counts, common_trigrams)
+
+
+def match_prefix(index: VenueIndex, name: str) -> Optional[tuple[int, float]]:
+    # Abbreviated journal-refs, e.g., "phys rev d" for "physical review d"
+    tokens = content_tokens(name)
+    if not tokens or all(len(token) == 1 for token in tokens):
+        return None
+
+    matches = []
+
+    for position in index.prefix.get(token_signature(tokens), []):
+        candidate_tokens = content_tokens(index.names[position])
+        if not all(candidate.startswith(token) for token, candidate in zip(tokens, candidate_tokens)):
+            continue
+
+        coverage = sum(map(len, tokens)) / sum(map(len, candidate_tokens))
+        if coverage >= MIN_PREFIX_COVERAGE:
+            matches.append((position, coverage))
+
+    # An abbreviation that expands to several venues is left to the fuzzy tier
+    if len(matches) != 1:
+        return None
+
+    position, coverage = matches[0]
+
+    return position, PREFIX_MIN_CONFIDENCE + (PREFIX_MAX_CONFIDENCE - PREFIX_MIN_CONFIDENCE) * coverage
+
+
+def match_fuzzy(index: VenueIndex, name: str, min_similarity: float) -> Optional[tuple[int, float]]:
+    name_grams = name_trigrams(name) - index.common_trigrams
+
+    shared = Counter()
+    for gram in name_grams:
+        shared.update(index.trigrams.get(gram, []))
+
+    best = None
+    for position, count in shared.items():
+        if count < MIN_SHARED_TRIGRAMS:
+            continue
+
+        similarity = count / (len(name_grams) + index.trigram_counts[position] - count)
+        if best is None or similarity > best[1]:
+            best = (position, similarity)
+
+    if best is None or best[1] < min_similarity:
+        return None
+
+    return best[0], FUZZY_MAX_CONFIDENCE * best[1]
+
+
+def resolve_venue_name(index: VenueIndex, name: str, min_similarity: float = 0.5) -> tuple:
+    if not name:
+        return None, None, 0.0
+
+    if name in index.exact:
+        return index.venue_ids[index.exact[name]], 'exact', EXACT_CONFIDENCE
+
+    match = match_prefix(index, name)
+    if match is not None:
+        return index.venue_ids[match[0]], 'prefix', match[1]
+
+    match = match_fuzzy(index, name, min_similarity)
+    if match is not None:
+        return index.venue_ids[match[0]], 'fuzzy', match[1]
+
+    return None, None, 0.0
+
+
+def resolve_venues(
+        journal_refs: pd.Series,
+        index: VenueIndex,
+        batch_size: int = 100_000,
+        min_similarity: float = 0.5,
+) -> pd.DataFrame:
+    # Many publications share a venue, so every distinct normalized name is resolved once across all batches
+    resolved = {}
+    batches = []
+
+    for start in range(0, len(journal_refs), batch_size):
+        batch = journal_refs.iloc[start:start + batch_size].dropna()
+
+        normalized = batch.astype(str).map(normalize_journal_ref)
+
+        for name in normalized.unique():
+            if name not in resolved:
+                resolved[name] = resolve_venue_name(index, name, min_similarity)
+
+        # Object dtype keeps venue IDs as written in venues.csv, unmatched refs would otherwise turn them into floats
+        matches = pd.DataFrame([resolved[name] for name in normalized], index=batch.index,
+                               columns=['venue_ID', 'match_type', 'confidence'], dtype=object)
+        matches['confidence'] = matches['confidence'].astype(float)
+        matches.insert(0, 'journal-ref', batch.values)
+
+        batches.append(matches)
+
+    if not batches:
+        return pd.DataFrame(columns=['journal-ref', 'venue_ID', 'match_type', 'confidence'])
+
+    return pd.concat(batches)